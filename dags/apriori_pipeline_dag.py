@@ -4,15 +4,21 @@ Airflow DAG to orchestrate the movie rental patterns analysis pipeline.
 Implements Market Basket Analysis using Apriori algorithm.
 
 Pipeline:
-1. Load Data: Load transactions from CSV
-2. Clean Data: Clean and preprocess transactions
-3. Run Apriori: Execute Apriori algorithm to find itemsets and rules
+1. Load and Clean Data: Stream transactions from CSV, clean and preprocess them
+2. Apriori levels: Level 1 finds the frequent items, then one task group
+   per itemset size (up to MAX_ITEMSET_SIZE) generates the candidates and
+   counts their support in dynamically mapped tasks
+3. Run Apriori: Merge the levels and generate association rules
 4. Generate Report: Generate readable reports of results
+
+Tasks use the TaskFlow API: each task returns the path of its output,
+which Airflow hands to the next task through XCom.
 """
 
 from airflow import DAG
-from airflow.operators.python import PythonOperator
+from airflow.decorators import task
 from airflow.utils.dates import days_ago
+from airflow.utils.task_group import TaskGroup
 from datetime import timedelta
 import sys
 import os
@@ -22,10 +28,11 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, os.path.join(BASE_DIR, 'scripts'))
 
 # Import functions from scripts
-from load_data import load_raw_transactions, save_loaded_data
-from clean_data import load_json_data, clean_transactions, generate_statistics, save_cleaned_data
-from apriori import AprioriAlgorithm, load_cleaned_transactions, save_results
-from generate_report import load_results, generate_text_report, generate_csv_reports, generate_summary_stats
+from load_data import load_raw_transactions
+from clean_data import clean_transactions, generate_statistics, save_statistics
+from apriori import (AprioriAlgorithm, load_cleaned_transactions, save_encoded_transactions,
+                     load_encoded_transactions, save_results)
+from generate_report import generate_reports
 
 
 # Define default DAG arguments
@@ -49,119 +56,224 @@ dag = DAG(
     tags=['data_mining', 'apriori', 'market_basket'],
 )
 
+# Apriori configuration shared by the level tasks. The tasks count support
+# themselves, so they use a level-wise backend rather than pyfim
+APRIORI_PARAMS = {
+    'min_support': 0.15,      # 15% of transactions
+    'min_confidence': 0.5,    # 50% confidence
+    'min_lift': 1.0,          # Lift greater than 1
+    'backend': 'bitmap'
+}
+
+# Largest itemset size searched (one task group per size)
+MAX_ITEMSET_SIZE = 5
+
 
-def task_load_data(**context):
+@task(task_id='load_and_clean_data')
+def task_load_and_clean_data(**context):
     """
-    Task 1: Load raw transaction data.
-    Reads CSV file and prepares data for processing.
+    Task 1: Load, clean and preprocess transactions.
+    Streams the CSV file in chunks, separates items, removes whitespace
+    and generates statistics.
+    
+    Returns:
+        str: Path of the persisted Parquet file with the cleaned transactions
     """
     print("="*60)
-    print("TASK 1: DATA LOADING")
+    print("TASK 1: DATA LOADING AND CLEANING")
     print("="*60)
     
     # Define paths
     RAW_FILE = os.path.join(BASE_DIR, 'data', 'raw', 'data.csv')
-    OUTPUT_FILE = os.path.join(BASE_DIR, 'data', 'processed', 'loaded_transactions.json')
+    OUTPUT_FILE = os.path.join(BASE_DIR, 'data', 'processed', 'cleaned_transactions.parquet')
+    STATS_FILE = os.path.join(BASE_DIR, 'data', 'processed', 'cleaning_stats.json')
     
-    # Load and save data
-    df = load_raw_transactions(RAW_FILE)
-    save_loaded_data(df, OUTPUT_FILE)
+    # Load and clean chunk by chunk, then save statistics
+    chunks = load_raw_transactions(RAW_FILE)
+    num_transactions, num_cleaned, item_counts = clean_transactions(chunks, OUTPUT_FILE)
+    stats = generate_statistics(item_counts, num_cleaned)
+    save_statistics(stats, STATS_FILE)
     
     # Save information in XCom for next tasks
-    context['ti'].xcom_push(key='num_transactions', value=len(df))
+    context['ti'].xcom_push(key='num_transactions', value=num_transactions)
+    context['ti'].xcom_push(key='num_cleaned_transactions', value=num_cleaned)
+    context['ti'].xcom_push(key='unique_movies', value=stats['unique_items'])
     
-    print("\n✓ Loading task completed successfully")
+    print("\n✓ Loading and cleaning task completed successfully")
+    
+    return OUTPUT_FILE
 
 
-def task_clean_data(**context):
+@task(task_id='level_1', multiple_outputs=True)
+def task_apriori_level_1(cleaned_file, **context):
     """
-    Task 2: Clean and preprocess transactions.
-    Separates items, removes whitespace and generates statistics.
+    Task 2: First Apriori level.
+    Encodes the transactions as item ids, shares them as a Parquet file
+    with the mapped tasks of the next levels and finds the frequent
+    itemsets of size 1.
+    
+    Args:
+        cleaned_file (str): Parquet file returned by the loading and cleaning task
+        
+    Returns:
+        dict: Encoded transactions file, item names and frequent itemsets
+            (as [item_ids, support] pairs)
     """
     print("="*60)
-    print("TASK 2: DATA CLEANING")
+    print("TASK 2: APRIORI LEVEL 1")
     print("="*60)
     
     # Define paths
-    INPUT_FILE = os.path.join(BASE_DIR, 'data', 'processed', 'loaded_transactions.json')
-    OUTPUT_FILE = os.path.join(BASE_DIR, 'data', 'processed', 'cleaned_transactions.json')
-    STATS_FILE = os.path.join(BASE_DIR, 'data', 'processed', 'cleaning_stats.json')
+    ENCODED_FILE = os.path.join(BASE_DIR, 'data', 'processed', 'encoded_transactions.parquet')
     
-    # Load, clean and save
-    raw_data = load_json_data(INPUT_FILE)
-    cleaned_transactions = clean_transactions(raw_data)
-    stats = generate_statistics(cleaned_transactions)
-    save_cleaned_data(cleaned_transactions, stats, OUTPUT_FILE, STATS_FILE)
+    # Load and encode transactions
+    transactions = load_cleaned_transactions(cleaned_file)
+    apriori = AprioriAlgorithm(**APRIORI_PARAMS)
+    apriori.load_transactions(transactions)
+    save_encoded_transactions(apriori.transactions_np, ENCODED_FILE)
     
-    # Save information in XCom
-    context['ti'].xcom_push(key='num_cleaned_transactions', value=len(cleaned_transactions))
-    context['ti'].xcom_push(key='unique_movies', value=stats['unique_items'])
+    frequent = apriori.get_frequent_1_itemsets()
+    
+    print("\n✓ Apriori level 1 completed successfully")
+    
+    return {
+        'encoded_file': ENCODED_FILE,
+        'id_to_item': apriori.id_to_item,
+        'frequent': [[list(itemset), support] for itemset, support in frequent.items()],
+    }
+
+
+@task(task_id='generate_candidates')
+def task_generate_candidates(prev_frequent, k, **context):
+    """
+    Generates and prunes the candidates of size k, split in chunks for
+    the mapped evaluation task.
+    
+    Args:
+        prev_frequent (list): Frequent itemsets of size k-1 as [item_ids, support]
+        k (int): Size of the candidates
+        
+    Returns:
+        list: Chunks of candidates; always at least one (possibly empty)
+            chunk, so the level is never skipped
+    """
+    prev_frequent_itemsets = {tuple(itemset): support for itemset, support in prev_frequent}
+    
+    apriori = AprioriAlgorithm(**APRIORI_PARAMS)
+    candidates = apriori.generate_candidates(prev_frequent_itemsets, k)
+    candidates = apriori.prune_candidates(candidates, prev_frequent_itemsets)
+    print(f"[INFO] {len(candidates)} candidates of size {k} after pruning")
+    
+    size = AprioriAlgorithm.CANDIDATE_CHUNK_SIZE
+    chunks = [candidates[i:i + size] for i in range(0, len(candidates), size)]
+    return chunks or [[]]
+
+
+@task(task_id='evaluate_candidates')
+def task_evaluate_candidates(chunk, encoded_file, id_to_item, **context):
+    """
+    Counts the support of one chunk of candidates (mapped task).
     
-    print("\n✓ Cleaning task completed successfully")
+    Args:
+        chunk (list): Candidates as lists of item ids
+        encoded_file (str): Parquet file with the encoded transactions
+        id_to_item (list): Item name of each item id
+        
+    Returns:
+        list: Frequent candidates of the chunk as [item_ids, support]
+    """
+    apriori = AprioriAlgorithm(**APRIORI_PARAMS)
+    apriori.load_encoded_transactions(load_encoded_transactions(encoded_file), id_to_item)
+    
+    supports = apriori.count_support(chunk)
+    return [
+        [candidate, support]
+        for candidate, support in zip(chunk, supports.tolist())
+        if support >= apriori.min_support
+    ]
 
 
-def task_run_apriori(**context):
+@task(task_id='merge_level')
+def task_merge_level(chunk_results, k, **context):
     """
-    Task 3: Execute Apriori algorithm.
-    Finds frequent itemsets and generates association rules.
+    Gathers the frequent itemsets found by the mapped tasks of a level.
+    
+    Args:
+        chunk_results (list): Results of every mapped evaluation task
+        k (int): Size of the itemsets of the level
+        
+    Returns:
+        list: Frequent itemsets of size k as [item_ids, support]
+    """
+    frequent = [pair for result in chunk_results for pair in result]
+    print(f"[INFO] Found {len(frequent)} frequent itemsets of size {k}")
+    return frequent
+
+
+@task(task_id='run_apriori')
+def task_run_apriori(levels, id_to_item, **context):
+    """
+    Task 3: Finish the Apriori algorithm.
+    Merges the frequent itemsets of every level and generates association rules.
+    
+    Args:
+        levels (list): Frequent itemsets of each level as [item_ids, support]
+        id_to_item (list): Item name of each item id
+        
+    Returns:
+        str: Directory with the results
     """
     print("="*60)
-    print("TASK 3: APRIORI EXECUTION")
+    print("TASK 3: APRIORI RULES")
     print("="*60)
     
     # Define paths
-    INPUT_FILE = os.path.join(BASE_DIR, 'data', 'processed', 'cleaned_transactions.json')
     OUTPUT_DIR = os.path.join(BASE_DIR, 'data', 'results')
     
-    # Load transactions
-    transactions = load_cleaned_transactions(INPUT_FILE)
+    frequent_itemsets = {
+        tuple(itemset): support
+        for level in levels
+        for itemset, support in level
+    }
     
-    # Configure and execute Apriori
-    apriori = AprioriAlgorithm(
-        min_support=0.15,      # 15% of transactions
-        min_confidence=0.5,    # 50% confidence
-        min_lift=1.0           # Lift greater than 1
-    )
+    if levels[-1]:
+        print(f"[WARNING] Itemsets larger than {MAX_ITEMSET_SIZE} items are not searched")
     
-    apriori.load_transactions(transactions)
-    frequent_itemsets = apriori.find_frequent_itemsets()
+    # Generate association rules from the merged levels
+    apriori = AprioriAlgorithm(**APRIORI_PARAMS)
+    apriori.frequent_itemsets = frequent_itemsets
     rules = apriori.generate_association_rules()
     
     # Save results
-    save_results(frequent_itemsets, rules, OUTPUT_DIR)
+    save_results(frequent_itemsets, rules, OUTPUT_DIR, id_to_item)
     
     # Save information in XCom
     context['ti'].xcom_push(key='num_frequent_itemsets', value=len(frequent_itemsets))
     context['ti'].xcom_push(key='num_rules', value=len(rules))
     
     print("\n✓ Apriori task completed successfully")
+    
+    return OUTPUT_DIR
 
 
-def task_generate_report(**context):
+@task(task_id='generate_report')
+def task_generate_report(results_dir, **context):
     """
     Task 4: Generate readable reports of results.
     Creates reports in text, CSV and summary statistics.
+    
+    Args:
+        results_dir (str): Directory returned by the Apriori task
     """
     print("="*60)
     print("TASK 4: REPORT GENERATION")
     print("="*60)
     
-    # Define paths
-    RESULTS_DIR = os.path.join(BASE_DIR, 'data', 'results')
-    
-    # Load results
-    frequent_itemsets, rules = load_results(RESULTS_DIR)
-    
-    # Generate reports
-    text_report_file = os.path.join(RESULTS_DIR, 'analysis_report.txt')
-    generate_text_report(frequent_itemsets, rules, text_report_file)
-    generate_csv_reports(frequent_itemsets, rules, RESULTS_DIR)
-    
-    stats_file = os.path.join(RESULTS_DIR, 'summary_statistics.json')
-    generate_summary_stats(frequent_itemsets, rules, stats_file)
+    # Generate reports, streaming the results files
+    generate_reports(results_dir)
     
     # Retrieve information from previous tasks
-    num_transactions = context['ti'].xcom_pull(task_ids='load_data', key='num_transactions')
+    num_transactions = context['ti'].xcom_pull(task_ids='load_and_clean_data', key='num_transactions')
     num_itemsets = context['ti'].xcom_pull(task_ids='run_apriori', key='num_frequent_itemsets')
     num_rules = context['ti'].xcom_pull(task_ids='run_apriori', key='num_rules')
     
@@ -176,34 +288,21 @@ def task_generate_report(**context):
     print("\n✓ Report task completed successfully")
 
 
-# Define DAG tasks
-load_data_task = PythonOperator(
-    task_id='load_data',
-    python_callable=task_load_data,
-    provide_context=True,
-    dag=dag,
-)
-
-clean_data_task = PythonOperator(
-    task_id='clean_data',
-    python_callable=task_clean_data,
-    provide_context=True,
-    dag=dag,
-)
-
-run_apriori_task = PythonOperator(
-    task_id='run_apriori',
-    python_callable=task_run_apriori,
-    provide_context=True,
-    dag=dag,
-)
-
-generate_report_task = PythonOperator(
-    task_id='generate_report',
-    python_callable=task_generate_report,
-    provide_context=True,
-    dag=dag,
-)
-
-# Define task execution order
-load_data_task >> clean_data_task >> run_apriori_task >> generate_report_task
\ No newline at end of file
+# Define task execution order: each task receives the output path of the previous one
+with dag:
+    cleaned_file = task_load_and_clean_data()
+    level_1 = task_apriori_level_1(cleaned_file)
+    
+    # One task group per itemset size; candidate evaluation is mapped over chunks
+    levels = [level_1['frequent']]
+    for k in range(2, MAX_ITEMSET_SIZE + 1):
+        with TaskGroup(group_id=f'level_{k}'):
+            chunks = task_generate_candidates(levels[-1], k)
+            chunk_results = task_evaluate_candidates.partial(
+                encoded_file=level_1['encoded_file'],
+                id_to_item=level_1['id_to_item'],
+            ).expand(chunk=chunks)
+            levels.append(task_merge_level(chunk_results, k))
+    
+    results_dir = task_run_apriori(levels, level_1['id_to_item'])
+    task_generate_report(results_dir)
\ No newline at end of file
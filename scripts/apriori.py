@@ -5,10 +5,82 @@ and generating association rules in movie rental data.
 """
 
 import json
+import math
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from itertools import combinations
-from collections import defaultdict
+from itertools import combinations, groupby
+
+import numpy as np
+import orjson
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+try:
+    import fim
+except ImportError:  # pyfim is only needed for backend='fim'
+    fim = None
+
+try:
+    import numba
+except ImportError:  # numba is optional, only needed for backend='numba'
+    numba = None
+
+
+# Popcount of a bitmap: native ufunc on NumPy >= 2.0, 16-bit lookup table otherwise
+if hasattr(np, 'bitwise_count'):
+    def _popcount(bitmap):
+        return int(np.bitwise_count(bitmap).sum())
+else:
+    _POPCOUNT_16 = np.array([bin(i).count('1') for i in range(1 << 16)], dtype=np.uint8)
+
+    def _popcount(bitmap):
+        return int(_POPCOUNT_16[bitmap.view(np.uint16)].sum())
+
+
+if numba is not None:
+    @numba.njit(cache=True)
+    def _contains_all(transaction, candidate):
+        """
+        Two-pointer merge checking that every item of a sorted candidate
+        appears in a sorted transaction.
+        """
+        i = 0
+        n = transaction.shape[0]
+        for item in candidate:
+            while i < n and transaction[i] < item:
+                i += 1
+            if i == n or transaction[i] != item:
+                return False
+            i += 1
+        return True
+
+    @numba.njit(parallel=True, cache=True)
+    def _count_support_batch(candidates_2d, tx_offsets, tx_items, item_offsets, item_tids):
+        """
+        Counts the transactions containing each candidate (one row of
+        candidates_2d) over transactions stored in CSR form. Only the
+        transactions containing the rarest item of the candidate, taken
+        from the item -> tids inverted index, are checked.
+        """
+        num_candidates = candidates_2d.shape[0]
+        counts = np.zeros(num_candidates, dtype=np.int32)
+        for c in numba.prange(num_candidates):
+            candidate = candidates_2d[c]
+            
+            # Pick the item with the smallest tid list
+            rarest = candidate[0]
+            for item in candidate:
+                if item_offsets[item + 1] - item_offsets[item] < item_offsets[rarest + 1] - item_offsets[rarest]:
+                    rarest = item
+            
+            count = 0
+            for j in range(item_offsets[rarest], item_offsets[rarest + 1]):
+                t = item_tids[j]
+                if _contains_all(tx_items[tx_offsets[t]:tx_offsets[t + 1]], candidate):
+                    count += 1
+            counts[c] = count
+        return counts
 
 
 class AprioriAlgorithm:
@@ -16,7 +88,11 @@ class AprioriAlgorithm:
     Class that implements the Apriori algorithm for frequent itemset mining.
     """
     
-    def __init__(self, min_support=0.15, min_confidence=0.5, min_lift=1.0):
+    BACKENDS = ('fim', 'bitmap', 'numba')
+    CANDIDATE_CHUNK_SIZE = 1024
+    
+    def __init__(self, min_support=0.15, min_confidence=0.5, min_lift=1.0, backend='fim',
+                 max_workers=None):
         """
         Initializes the Apriori algorithm.
         
@@ -24,12 +100,35 @@ class AprioriAlgorithm:
             min_support (float): Minimum support (0-1)
             min_confidence (float): Minimum confidence (0-1)
             min_lift (float): Minimum lift
+            backend (str): Frequent itemset mining backend: 'fim' (the C
+                implementation of pyfim), or one of the level-wise searches
+                of this class, 'bitmap' (NumPy bitmap intersections) or
+                'numba' (compiled scan, requires numba)
+            max_workers (int): Threads used to count bitmap supports
+                (None for the ThreadPoolExecutor default)
         """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}', expected one of {self.BACKENDS}")
+        if backend == 'fim' and fim is None:
+            raise ImportError("The 'fim' backend requires the pyfim package")
+        if backend == 'numba' and numba is None:
+            raise ImportError("The 'numba' backend requires the numba package")
+        
+        self.backend = backend
+        self.max_workers = max_workers
         self.min_support = min_support
         self.min_confidence = min_confidence
         self.min_lift = min_lift
-        self.transactions = []
+        self.item_to_id = {}
+        self.id_to_item = []
+        self.transactions_np = []
         self.num_transactions = 0
+        self.bitmaps = {}
+        self.item_bitmaps = None
+        self.tx_offsets = None
+        self.tx_items = None
+        self.item_offsets = None
+        self.item_tids = None
         self.frequent_itemsets = {}
         self.association_rules = []
     
@@ -40,23 +139,106 @@ class AprioriAlgorithm:
         Args:
             transactions (list): List of lists with items
         """
-        # Convert each transaction to frozenset to facilitate operations
-        self.transactions = [frozenset(t) for t in transactions]
-        self.num_transactions = len(self.transactions)
+        # Encode items as contiguous integer ids (in order of first appearance)
+        # and store each transaction as a sorted array of unique ids
+        self.item_to_id = {}
+        self.transactions_np = []
+        for transaction in transactions:
+            ids = {self.item_to_id.setdefault(item, len(self.item_to_id)) for item in transaction}
+            self.transactions_np.append(np.array(sorted(ids), dtype=np.int32))
+        self.id_to_item = list(self.item_to_id)
+        self._index_transactions()
+    
+    def load_encoded_transactions(self, transactions_np, id_to_item):
+        """
+        Loads transactions that are already encoded as item ids, e.g. by a
+        previous call to load_transactions in another process.
+        
+        Args:
+            transactions_np (list): List of sorted int32 arrays of item ids
+            id_to_item (list): Item name of each item id
+        """
+        self.id_to_item = list(id_to_item)
+        self.item_to_id = {item: item_id for item_id, item in enumerate(self.id_to_item)}
+        self.transactions_np = transactions_np
+        self._index_transactions()
+    
+    def _index_transactions(self):
+        """
+        Builds the structures used by the selected backend to count support.
+        """
+        self.num_transactions = len(self.transactions_np)
+        
+        # pyfim builds its own structures from the transactions
+        if self.backend == 'numba':
+            self._build_csr()
+        elif self.backend == 'bitmap':
+            self._build_bitmaps()
+        
         print(f"[INFO] Loaded {self.num_transactions} transactions")
     
-    def calculate_support(self, itemset):
+    def _build_bitmaps(self):
+        """
+        Builds the vertical layout of the transactions: one bitmap per item,
+        with bit t set when transaction t contains the item.
+        """
+        num_words = (self.num_transactions + 63) // 64
+        
+        # Flatten the transactions into parallel (item id, transaction id) arrays
+        items = self._concatenated_items()
+        lengths = np.fromiter(map(len, self.transactions_np), dtype=np.int64, count=self.num_transactions)
+        tids = np.repeat(np.arange(self.num_transactions, dtype=np.uint64), lengths)
+        
+        # Set every (item, transaction) bit in one vectorized call
+        self.item_bitmaps = np.zeros((len(self.id_to_item), num_words), dtype=np.uint64)
+        np.bitwise_or.at(self.item_bitmaps, (items, tids >> np.uint64(6)), np.uint64(1) << (tids & np.uint64(63)))
+        self.bitmaps = {(item_id,): self.item_bitmaps[item_id] for item_id in range(len(self.id_to_item))}
+    
+    def _build_csr(self):
         """
-        Calculates the support of an itemset.
+        Packs the transactions in CSR form: transaction t holds the item ids
+        tx_items[tx_offsets[t]:tx_offsets[t+1]]. Also builds the inverted
+        index in the same form: item i appears in the transactions
+        item_tids[item_offsets[i]:item_offsets[i+1]].
+        """
+        self.tx_items = self._concatenated_items()
+        lengths = np.fromiter(map(len, self.transactions_np), dtype=np.int64, count=self.num_transactions)
+        self.tx_offsets = np.zeros(self.num_transactions + 1, dtype=np.int64)
+        np.cumsum(lengths, out=self.tx_offsets[1:])
+        
+        # Group the transaction ids by item (stable, so each tid list stays sorted)
+        tids = np.repeat(np.arange(self.num_transactions, dtype=np.int64), lengths)
+        self.item_tids = tids[np.argsort(self.tx_items, kind='stable')]
+        item_freq = np.bincount(self.tx_items, minlength=len(self.id_to_item))
+        self.item_offsets = np.zeros(len(self.id_to_item) + 1, dtype=np.int64)
+        np.cumsum(item_freq, out=self.item_offsets[1:])
+    
+    def _concatenated_items(self):
+        """
+        Returns the item ids of all transactions as a single array.
+        
+        Returns:
+            np.ndarray: Concatenated int32 item ids
+        """
+        if not self.transactions_np:
+            return np.empty(0, dtype=np.int32)
+        return np.concatenate(self.transactions_np)
+    
+    def candidate_bitmap(self, candidate, out):
+        """
+        Calculates the bitmap of a candidate by intersecting the bitmaps
+        of two of its (k-1)-subsets, which are frequent after pruning.
         
         Args:
-            itemset (frozenset): Set of items
+            candidate (tuple): Candidate itemset of size k (sorted item ids)
+            out (np.ndarray): Scratch buffer receiving the intersection
             
         Returns:
-            float: Support value (0-1)
+            np.ndarray: Bitmap of the transactions containing the candidate
         """
-        count = sum(1 for transaction in self.transactions if itemset.issubset(transaction))
-        return count / self.num_transactions
+        subset_a = candidate[:-1]
+        subset_b = candidate[:-2] + candidate[-1:]
+        return np.bitwise_and(self.bitmaps[subset_a], self.bitmaps[subset_b], out=out)
     
     def get_frequent_1_itemsets(self):
         """
@@ -67,18 +249,18 @@ class AprioriAlgorithm:
         """
         print("[INFO] Generating frequent itemsets of size 1...")
         
-        # Count occurrences of each individual item
-        item_counts = defaultdict(int)
-        for transaction in self.transactions:
-            for item in transaction:
-                item_counts[frozenset([item])] += 1
+        # Count occurrences of each individual item in one pass
+        counts = np.bincount(self._concatenated_items(), minlength=len(self.id_to_item))
+        supports = counts / self.num_transactions
         
         # Filter by minimum support
-        frequent_itemsets = {}
-        for itemset, count in item_counts.items():
-            support = count / self.num_transactions
-            if support >= self.min_support:
-                frequent_itemsets[itemset] = support
+        frequent_ids = np.flatnonzero(supports >= self.min_support)
+        frequent_itemsets = {
+            (item_id,): support
+            for item_id, support in zip(frequent_ids.tolist(), supports[frequent_ids].tolist())
+        }
+        if self.backend == 'bitmap':
+            self.bitmaps = {itemset: self.bitmaps[itemset] for itemset in frequent_itemsets}
         
         print(f"[INFO] Found {len(frequent_itemsets)} frequent itemsets of size 1")
         return frequent_itemsets
@@ -86,20 +268,25 @@ class AprioriAlgorithm:
     def generate_candidates(self, prev_frequent_itemsets, k):
         """
         Generates candidates of size k from frequent itemsets of size k-1.
+        Two (k-1)-itemsets are joined only when their first k-2 items
+        (in sorted order) are identical.
         
         Args:
-            prev_frequent_itemsets (dict): Frequent itemsets from previous level
+            prev_frequent_itemsets (dict): Frequent itemsets from previous level,
+                keyed by sorted tuples of item ids
             k (int): Size of new candidates
             
         Returns:
-            list: List of candidates (frozensets)
+            list: List of candidates (sorted tuples of item ids)
         """
-        items = set()
-        for itemset in prev_frequent_itemsets.keys():
-            items.update(itemset)
+        sorted_prev = sorted(prev_frequent_itemsets)
         
-        # Generate all combinations of size k
-        candidates = [frozenset(combo) for combo in combinations(items, k)]
+        # Join every pair of itemsets sharing the same (k-2)-prefix
+        candidates = []
+        for prefix, group in groupby(sorted_prev, key=lambda itemset: itemset[:k-2]):
+            last_items = [itemset[-1] for itemset in group]
+            for a, b in combinations(last_items, 2):
+                candidates.append(prefix + (a, b))
         
         return candidates
     
@@ -109,8 +296,9 @@ class AprioriAlgorithm:
         must be frequent.
         
         Args:
-            candidates (list): List of candidates
-            prev_frequent_itemsets (dict): Frequent itemsets from previous level
+            candidates (list): List of candidates (sorted tuples from generate_candidates)
+            prev_frequent_itemsets (dict): Frequent itemsets from previous level,
+                keyed by sorted tuples of item ids
             
         Returns:
             list: List of candidates after pruning
@@ -118,21 +306,133 @@ class AprioriAlgorithm:
         pruned = []
         
         for candidate in candidates:
-            # Generate all subsets of size k-1
-            subsets = [frozenset(combo) for combo in combinations(candidate, len(candidate)-1)]
-            
-            # Verify that all subsets are frequent
-            if all(subset in prev_frequent_itemsets for subset in subsets):
+            # Dropping either of the last two items gives one of the joined
+            # itemsets, so only the remaining k-2 subsets of size k-1 are checked
+            if all(candidate[:i] + candidate[i+1:] in prev_frequent_itemsets for i in range(len(candidate) - 2)):
                 pruned.append(candidate)
         
         return pruned
     
+    def evaluate_candidates(self, candidates):
+        """
+        Calculates the support of the candidates of one level and keeps the
+        frequent ones.
+        
+        Args:
+            candidates (list): List of candidates (sorted tuples of item ids)
+            
+        Returns:
+            dict: Dictionary {itemset: support} of the frequent candidates
+        """
+        self._check_level_wise_backend()
+        if self.backend == 'numba':
+            return self._evaluate_candidates_numba(candidates)
+        return self._evaluate_candidates_bitmap(candidates)
+    
+    def _evaluate_candidates_bitmap(self, candidates):
+        """
+        Calculates support by bitmap intersection. Chunks of candidates are
+        evaluated in parallel threads, as NumPy releases the GIL.
+        """
+        size = self.CANDIDATE_CHUNK_SIZE
+        chunks = [candidates[i:i + size] for i in range(0, len(candidates), size)]
+        
+        if len(chunks) > 1:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                results = list(executor.map(self._evaluate_chunk_bitmap, chunks))
+        else:
+            results = [self._evaluate_chunk_bitmap(chunk) for chunk in chunks]
+        
+        frequent = {}
+        frequent_bitmaps = {}
+        for chunk_result in results:
+            for candidate, support, bitmap in chunk_result:
+                itemset = tuple(candidate)
+                frequent[itemset] = support
+                frequent_bitmaps[itemset] = bitmap
+        
+        # Only the bitmaps of the last level are needed for the next one
+        self.bitmaps = frequent_bitmaps
+        return frequent
+    
+    def _evaluate_chunk_bitmap(self, chunk):
+        """
+        Evaluates one chunk of candidates with its own scratch buffer.
+        
+        Returns:
+            list: (candidate, support, bitmap) of the frequent candidates
+        """
+        scratch = np.empty((self.num_transactions + 63) // 64, dtype=np.uint64)
+        frequent = []
+        for candidate in chunk:
+            bitmap = self.candidate_bitmap(candidate, scratch)
+            support = _popcount(bitmap) / self.num_transactions
+            if support >= self.min_support:
+                frequent.append((candidate, support, bitmap.copy()))
+        return frequent
+    
+    def _evaluate_candidates_numba(self, candidates):
+        """
+        Calculates support with the compiled CSR scan.
+        """
+        if not candidates:
+            return {}
+        
+        candidates_2d = np.array(candidates, dtype=np.int32)
+        counts = _count_support_batch(candidates_2d, self.tx_offsets, self.tx_items,
+                                      self.item_offsets, self.item_tids)
+        supports = counts / self.num_transactions
+        
+        frequent = np.flatnonzero(supports >= self.min_support)
+        return {tuple(candidates[i]): support for i, support in zip(frequent.tolist(), supports[frequent].tolist())}
+    
+    def count_support(self, candidates):
+        """
+        Calculates the support of arbitrary candidates from the item-level
+        structures only, without the bitmaps of the previous level. Used
+        when candidates are evaluated apart from the level-wise search
+        (e.g. in mapped Airflow tasks).
+        
+        Args:
+            candidates (list): List of candidates of the same size
+                (sorted sequences of item ids)
+            
+        Returns:
+            np.ndarray: Support of each candidate
+        """
+        self._check_level_wise_backend()
+        if not candidates:
+            return np.zeros(0)
+        
+        if self.backend == 'numba':
+            candidates_2d = np.array(candidates, dtype=np.int32)
+            counts = _count_support_batch(candidates_2d, self.tx_offsets, self.tx_items,
+                                          self.item_offsets, self.item_tids)
+            return counts / self.num_transactions
+        
+        # AND together the bitmaps of all the items of each candidate
+        scratch = np.empty(self.item_bitmaps.shape[1], dtype=np.uint64)
+        counts = np.empty(len(candidates), dtype=np.int64)
+        for i, candidate in enumerate(candidates):
+            np.bitwise_and.reduce(self.item_bitmaps[list(candidate)], axis=0, out=scratch)
+            counts[i] = _popcount(scratch)
+        return counts / self.num_transactions
+    
+    def _check_level_wise_backend(self):
+        """
+        Raises an error when support is counted by this class with the 'fim'
+        backend, which indexes no transactions.
+        """
+        if self.backend == 'fim':
+            raise ValueError("Support counting requires the 'bitmap' or 'numba' backend")
+    
     def find_frequent_itemsets(self):
         """
         Finds all frequent itemsets using the Apriori algorithm.
         
         Returns:
-            dict: Dictionary with all frequent itemsets and their supports
+            dict: Dictionary with all frequent itemsets (sorted tuples of item ids)
+                and their supports
         """
         print("\n" + "="*60)
         print("RUNNING APRIORI ALGORITHM")
@@ -140,6 +440,12 @@ class AprioriAlgorithm:
         print(f"Minimum support: {self.min_support}")
         print()
         
+        if self.backend == 'fim':
+            all_frequent_itemsets = self._find_frequent_itemsets_fim()
+            self.frequent_itemsets = all_frequent_itemsets
+            print(f"\n[INFO] Total frequent itemsets found: {len(all_frequent_itemsets)}")
+            return all_frequent_itemsets
+        
         all_frequent_itemsets = {}
         
         # Step 1: Find frequent itemsets of size 1
@@ -161,11 +467,7 @@ class AprioriAlgorithm:
             print(f"[INFO] After pruning: {len(candidates)} candidates")
             
             # Calculate support and filter
-            current_frequent = {}
-            for candidate in candidates:
-                support = self.calculate_support(candidate)
-                if support >= self.min_support:
-                    current_frequent[candidate] = support
+            current_frequent = self.evaluate_candidates(candidates)
             
             print(f"[INFO] Found {len(current_frequent)} frequent itemsets of size {k}")
             
@@ -179,12 +481,87 @@ class AprioriAlgorithm:
         
         return all_frequent_itemsets
     
+    def _find_frequent_itemsets_fim(self):
+        """
+        Finds all frequent itemsets with pyfim's apriori.
+        
+        Returns:
+            dict: Dictionary with all frequent itemsets (sorted tuples of item ids)
+                and their supports, in the order of the level-wise search
+        """
+        if not self.num_transactions:
+            return {}
+        
+        # Pass the threshold as an absolute count (negative supp) so pyfim
+        # keeps exactly the itemsets with count / num_transactions >= min_support
+        min_count = math.ceil(self.min_support * self.num_transactions)
+        while min_count > 0 and (min_count - 1) / self.num_transactions >= self.min_support:
+            min_count -= 1
+        while min_count / self.num_transactions < self.min_support:
+            min_count += 1
+        
+        # pyfim leaves out the items found in every transaction, and every
+        # itemset containing them, so mine without them and add them back:
+        # joining any subset of them to an itemset keeps its count
+        item_counts = np.bincount(self._concatenated_items(), minlength=len(self.id_to_item))
+        universal = np.flatnonzero(item_counts == self.num_transactions).tolist()
+        if universal:
+            universal_set = set(universal)
+            transactions = [[item for item in transaction.tolist() if item not in universal_set]
+                            for transaction in self.transactions_np]
+        else:
+            transactions = [transaction.tolist() for transaction in self.transactions_np]
+        results = fim.apriori(transactions, target='s', supp=-min_count, zmin=1, report='a')
+        
+        if universal and self.num_transactions >= min_count:
+            results.append(((), self.num_transactions))
+            results = [
+                (tuple(itemset) + extra, count)
+                for itemset, count in results
+                for size in range(len(universal) + 1)
+                for extra in combinations(universal, size)
+                if itemset or extra
+            ]
+        
+        # Order by size, then by sorted item ids, as the level-wise search does
+        results = sorted(((tuple(sorted(itemset)), count) for itemset, count in results),
+                         key=lambda result: (len(result[0]), result[0]))
+        
+        frequent_itemsets = {}
+        for size, group in groupby(results, key=lambda result: len(result[0])):
+            group = list(group)
+            for itemset, count in group:
+                frequent_itemsets[itemset] = count / self.num_transactions
+            print(f"[INFO] Found {len(group)} frequent itemsets of size {size}")
+        
+        return frequent_itemsets
+    
+    @staticmethod
+    def _subset_index(index_of, subset, itemset):
+        """
+        Returns the index of a subset of a frequent itemset. Every subset
+        of a frequent itemset is frequent (anti-monotone property), so a
+        missing subset means the frequent itemsets are inconsistent.
+        
+        Args:
+            index_of (dict): Index of each frequent itemset bitmask
+            subset (int): Bitmask of an antecedent or consequent of a rule
+            itemset (tuple): Frequent itemset containing the subset (sorted item ids)
+            
+        Returns:
+            int: Index of the subset
+        """
+        try:
+            return index_of[subset]
+        except KeyError:
+            raise ValueError(f"A subset of frequent itemset {list(itemset)} is not frequent") from None
+    
     def generate_association_rules(self):
         """
         Generates association rules from frequent itemsets.
         
         Returns:
-            list: List of rules with their metrics
+            list: List of rules with their metrics (items given as item ids)
         """
         print("\n" + "="*60)
         print("GENERATING ASSOCIATION RULES")
@@ -193,46 +570,68 @@ class AprioriAlgorithm:
         print(f"Minimum lift: {self.min_lift}")
         print()
         
-        rules = []
+        # Represent itemsets as integer bitmasks, with one bit per item
+        # appearing in a frequent itemset
+        items = sorted(set().union(*self.frequent_itemsets))
+        bit_of = {item: 1 << rank for rank, item in enumerate(items)}
+        itemsets = list(self.frequent_itemsets)
+        masks = [sum(bit_of[item] for item in itemset) for itemset in itemsets]
         
-        # Iterate over itemsets of size >= 2
-        for itemset, support_itemset in self.frequent_itemsets.items():
-            if len(itemset) < 2:
+        # Index every frequent itemset, computing each support lookup once
+        index_of = {mask: i for i, mask in enumerate(masks)}
+        supports = np.fromiter(self.frequent_itemsets.values(), dtype=np.float64, count=len(index_of))
+        
+        # First pass: enumerate all (itemset, antecedent, consequent) splits
+        # of the itemsets of size >= 2
+        splits = []
+        idx_itemset, idx_antecedent, idx_consequent = [], [], []
+        for i_itemset, (itemset, mask) in enumerate(zip(itemsets, masks)):
+            k = len(itemset)
+            if k < 2:
                 continue
             
-            # Generate all possible divisions of the itemset
-            for i in range(1, len(itemset)):
-                for antecedent in combinations(itemset, i):
-                    antecedent = frozenset(antecedent)
-                    consequent = itemset - antecedent
-                    
-                    # Calculate metrics
-                    support_antecedent = self.frequent_itemsets.get(antecedent, 0)
-                    support_consequent = self.frequent_itemsets.get(consequent, 0)
-                    
-                    if support_antecedent == 0:
-                        continue
-                    
-                    confidence = support_itemset / support_antecedent
-                    
-                    if support_consequent == 0:
-                        lift = 0
-                    else:
-                        lift = confidence / support_consequent
-                    
-                    # Filter by minimum confidence and lift
-                    if confidence >= self.min_confidence and lift >= self.min_lift:
-                        rule = {
-                            'antecedent': list(antecedent),
-                            'consequent': list(consequent),
-                            'support': round(support_itemset, 4),
-                            'confidence': round(confidence, 4),
-                            'lift': round(lift, 4)
-                        }
-                        rules.append(rule)
-        
-        # Sort rules by lift descending
-        rules.sort(key=lambda x: x['lift'], reverse=True)
+            # Every nonempty proper subset picks the items of the bits set in `subset`
+            bits = [bit_of[item] for item in itemset]
+            for subset in range(1, (1 << k) - 1):
+                antecedent = 0
+                for b in range(k):
+                    if subset >> b & 1:
+                        antecedent |= bits[b]
+                splits.append((itemset, subset))
+                idx_itemset.append(i_itemset)
+                idx_antecedent.append(self._subset_index(index_of, antecedent, itemset))
+                idx_consequent.append(self._subset_index(index_of, mask ^ antecedent, itemset))
+        
+        # Calculate metrics for all splits at once
+        support_itemset = supports[idx_itemset]
+        support_antecedent = supports[idx_antecedent]
+        support_consequent = supports[idx_consequent]
+        
+        confidence = np.divide(support_itemset, support_antecedent,
+                               out=np.zeros_like(support_itemset), where=support_antecedent > 0)
+        lift = np.divide(confidence, support_consequent,
+                         out=np.zeros_like(confidence), where=support_consequent > 0)
+        
+        # Filter by minimum confidence and lift
+        mask = (confidence >= self.min_confidence) & (lift >= self.min_lift)
+        kept = np.flatnonzero(mask)
+        
+        # Build rule dictionaries only for the rules that passed the filters
+        rules = []
+        for i, sup, conf, lft in zip(kept.tolist(), support_itemset[kept].tolist(),
+                                     confidence[kept].tolist(), lift[kept].tolist()):
+            itemset, subset = splits[i]
+            rules.append({
+                'antecedent': [item for b, item in enumerate(itemset) if subset >> b & 1],
+                'consequent': [item for b, item in enumerate(itemset) if not subset >> b & 1],
+                'support': round(sup, 4),
+                'confidence': round(conf, 4),
+                'lift': round(lft, 4)
+            })
+        
+        # Sort rules by lift descending (stable, so ties keep generation order)
+        order = np.argsort(-np.array([rule['lift'] for rule in rules]), kind='stable')
+        rules = [rules[i] for i in order.tolist()]
         
         self.association_rules = rules
         print(f"[INFO] Total rules generated: {len(rules)}")
@@ -242,39 +641,77 @@ class AprioriAlgorithm:
 
 def load_cleaned_transactions(file_path):
     """
-    Loads cleaned transactions from JSON.
+    Loads cleaned transactions from Parquet.
     
     Args:
-        file_path (str): Path to JSON file
+        file_path (str): Path to Parquet file
         
     Returns:
         list: List of transactions
     """
     print(f"[INFO] Loading transactions from: {file_path}")
     
-    with open(file_path, 'r') as f:
-        transactions = json.load(f)
+    transactions = pq.read_table(file_path, columns=['items']).column('items').to_pylist()
     
     print(f"[INFO] Loaded {len(transactions)} transactions")
     return transactions
 
 
-def save_results(frequent_itemsets, rules, output_dir):
+def save_encoded_transactions(transactions_np, file_path):
     """
-    Saves frequent itemsets and association rules.
+    Saves integer-encoded transactions as a Parquet file with a
+    list<int32> column.
+    
+    Args:
+        transactions_np (list): List of sorted int32 arrays of item ids
+        file_path (str): Path to Parquet file
+    """
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    
+    table = pa.table({'items': pa.array(transactions_np, type=pa.list_(pa.int32()))})
+    pq.write_table(table, file_path, compression='zstd')
+    print(f"[INFO] Encoded transactions saved to: {file_path}")
+
+
+def load_encoded_transactions(file_path):
+    """
+    Loads integer-encoded transactions saved by save_encoded_transactions.
+    
+    Args:
+        file_path (str): Path to Parquet file
+        
+    Returns:
+        list: List of sorted int32 arrays of item ids
+    """
+    items = pq.read_table(file_path, columns=['items']).column('items').combine_chunks()
+    
+    # Split the flat values buffer at the list offsets (views, no copies)
+    offsets = items.offsets.to_numpy()
+    values = items.values.to_numpy()
+    return [values[offsets[i]:offsets[i + 1]] for i in range(len(items))]
+
+
+def save_results(frequent_itemsets, rules, output_dir, id_to_item):
+    """
+    Saves frequent itemsets and association rules, translating item ids
+    back to item names.
     
     Args:
         frequent_itemsets (dict): Frequent itemsets with their supports
         rules (list): List of association rules
         output_dir (str): Output directory
+        id_to_item (list): Item name of each item id
     """
     os.makedirs(output_dir, exist_ok=True)
     
+    def decode(item_ids):
+        return [id_to_item[item_id] for item_id in item_ids]
+    
     # Convert itemsets to serializable format
     itemsets_list = []
     for itemset, support in frequent_itemsets.items():
         itemsets_list.append({
-            'itemset': list(itemset),
+            'itemset': decode(itemset),
             'size': len(itemset),
             'support': round(support, 4)
         })
@@ -282,16 +719,22 @@ def save_results(frequent_itemsets, rules, output_dir):
     # Sort by support descending
     itemsets_list.sort(key=lambda x: x['support'], reverse=True)
     
-    # Save frequent itemsets
+    # Save frequent itemsets as compact JSON
     itemsets_file = os.path.join(output_dir, 'frequent_itemsets.json')
-    with open(itemsets_file, 'w') as f:
-        json.dump(itemsets_list, f, indent=2)
+    with open(itemsets_file, 'wb') as f:
+        f.write(orjson.dumps(itemsets_list, option=orjson.OPT_APPEND_NEWLINE))
     print(f"[INFO] Frequent itemsets saved to: {itemsets_file}")
     
-    # Save association rules
+    # Convert rules to serializable format
+    rules_list = [
+        dict(rule, antecedent=decode(rule['antecedent']), consequent=decode(rule['consequent']))
+        for rule in rules
+    ]
+    
+    # Save association rules (kept indented for human inspection)
     rules_file = os.path.join(output_dir, 'association_rules.json')
     with open(rules_file, 'w') as f:
-        json.dump(rules, f, indent=2)
+        json.dump(rules_list, f, indent=2)
     print(f"[INFO] Association rules saved to: {rules_file}")
 
 
@@ -308,7 +751,7 @@ def main():
     
     # Define paths
     BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    INPUT_FILE = os.path.join(BASE_DIR, 'data', 'processed', 'cleaned_transactions.json')
+    INPUT_FILE = os.path.join(BASE_DIR, 'data', 'processed', 'cleaned_transactions.parquet')
     OUTPUT_DIR = os.path.join(BASE_DIR, 'data', 'results')
     
     # Load transactions
@@ -331,7 +774,7 @@ def main():
     rules = apriori.generate_association_rules()
     
     # Save results
-    save_results(frequent_itemsets, rules, OUTPUT_DIR)
+    save_results(frequent_itemsets, rules, OUTPUT_DIR, apriori.id_to_item)
     
     print("\n" + "="*60)
     print("APRIORI ALGORITHM COMPLETED SUCCESSFULLY")
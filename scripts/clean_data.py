@@ -1,87 +1,112 @@
 """
 clean_data.py
 Script to clean and process movie rental transactions.
-Converts CSV format to a clean list of transactions.
+Streams the raw CSV file into a clean Parquet file of transactions.
 """
 
 import json
 import os
 from datetime import datetime
-from collections import Counter
 
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 
-def load_json_data(file_path):
+from load_data import load_raw_transactions
+
+
+CLEANED_SCHEMA = pa.schema([('tid', pa.int32()), ('items', pa.list_(pa.string()))])
+
+
+def clean_chunk(chunk):
     """
-    Loads data from the JSON file generated in the previous step.
+    Cleans one chunk of raw transactions, separating items and removing whitespace.
     
     Args:
-        file_path (str): Path to the JSON file
+        chunk (pa.RecordBatch): Raw transactions with an Items column
         
     Returns:
-        list: List of dictionaries with transactions
+        pa.ListArray: Clean items of each transaction with at least one item
     """
-    print(f"[INFO] Loading data from: {file_path}")
-    
-    with open(file_path, 'r') as f:
-        data = json.load(f)
-    
-    print(f"[INFO] Loaded {len(data)} transactions")
-    return data
+    # Split items by comma, clean whitespace and filter empty items,
+    # with Arrow kernels (no Python strings are created)
+    lists = pc.split_pattern(chunk.column('Items'), ',')
+    rows = pc.list_parent_indices(lists)
+    items = pc.utf8_trim_whitespace(pc.list_flatten(lists))
+    keep = pc.not_equal(items, '')
+    items = items.filter(keep)
+    rows = rows.filter(keep).to_numpy()
+    
+    # The items of a transaction stay contiguous, so each change of
+    # parent row starts a new list
+    starts = np.ones(len(rows), dtype=bool)
+    starts[1:] = rows[1:] != rows[:-1]
+    offsets = np.append(np.flatnonzero(starts), len(rows)).astype(np.int32)
+    
+    return pa.ListArray.from_arrays(offsets, items)
 
 
-def clean_transactions(raw_data):
+def clean_transactions(chunks, output_file):
     """
-    Cleans transactions, separating items and removing whitespace.
+    Cleans raw transactions chunk by chunk, appending them to a
+    zstd-compressed Parquet file, and counts the items on the way.
     
     Args:
-        raw_data (list): List of dictionaries with raw transactions
+        chunks (iterable): Record batches of raw transactions
+        output_file (str): Path to save cleaned transactions
         
     Returns:
-        list: List of lists, where each sublist is a clean transaction
+        tuple: Number of raw transactions, number of clean transactions and
+            dictionary {item: count} in order of first appearance
     """
     print("[INFO] Cleaning transactions...")
     
-    cleaned_transactions = []
-    
-    for record in raw_data:
-        transaction_id = record['TransactionID']
-        items_str = record['Items']
-        
-        # Split items by comma and clean whitespace
-        items = [item.strip() for item in items_str.split(',')]
-        
-        # Filter empty items
-        items = [item for item in items if item]
-        
-        if items:  # Only add if there are items
-            cleaned_transactions.append(items)
+    # Create directories if they don't exist
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
     
-    print(f"[INFO] Cleaned {len(cleaned_transactions)} valid transactions")
-    return cleaned_transactions
+    num_raw = 0
+    num_cleaned = 0
+    item_counts = {}
+    
+    with pq.ParquetWriter(output_file, CLEANED_SCHEMA, compression='zstd') as writer:
+        for chunk in chunks:
+            transactions = clean_chunk(chunk)
+            tids = np.arange(num_cleaned, num_cleaned + len(transactions), dtype=np.int32)
+            writer.write_table(pa.Table.from_arrays([pa.array(tids), transactions], schema=CLEANED_SCHEMA))
+            
+            # Count the items of the chunk in one vectorized pass
+            # (value_counts keeps the order of first appearance)
+            counts = pc.value_counts(transactions.flatten())
+            for item, count in zip(counts.field('values').to_pylist(), counts.field('counts').to_pylist()):
+                item_counts[item] = item_counts.get(item, 0) + count
+            
+            num_raw += len(chunk)
+            num_cleaned += len(transactions)
+    
+    print(f"[INFO] Loaded {num_raw} transactions")
+    print(f"[INFO] Cleaned {num_cleaned} valid transactions")
+    print(f"[INFO] Cleaned transactions saved to: {output_file}")
+    return num_raw, num_cleaned, item_counts
 
 
-def generate_statistics(transactions):
+def generate_statistics(item_counts, total_transactions):
     """
     Generates basic statistics about the transactions.
     
     Args:
-        transactions (list): List of clean transactions
+        item_counts (dict): Dictionary {item: count} in order of first appearance
+        total_transactions (int): Number of clean transactions
         
     Returns:
         dict: Dictionary with statistics
     """
     print("[INFO] Generating statistics...")
     
-    # Count all items
-    all_items = []
-    for transaction in transactions:
-        all_items.extend(transaction)
-    
-    item_counts = Counter(all_items)
+    counts = np.fromiter(item_counts.values(), dtype=np.int64, count=len(item_counts))
     
     # Calculate statistics
-    total_transactions = len(transactions)
-    total_items_rented = len(all_items)
+    total_items_rented = int(counts.sum())
     unique_items = len(item_counts)
     avg_items_per_transaction = total_items_rented / total_transactions if total_transactions > 0 else 0
     
@@ -90,32 +115,43 @@ def generate_statistics(transactions):
         'total_items_rented': total_items_rented,
         'unique_items': unique_items,
         'avg_items_per_transaction': round(avg_items_per_transaction, 2),
-        'most_common_items': dict(item_counts.most_common(10))
+        'most_common_items': most_common_items(counts, list(item_counts), 10)
     }
     
     return stats
 
 
-def save_cleaned_data(transactions, stats, output_file, stats_file):
+def most_common_items(item_counts, items, n):
     """
-    Saves cleaned transactions and statistics.
+    Selects the n most frequent items, ties broken by first appearance.
+    
+    Args:
+        item_counts (np.ndarray): Count of each item code
+        items (list): Item of each item code
+        n (int): Number of items to select
+        
+    Returns:
+        dict: Dictionary {item: count} ordered by count descending
+    """
+    if len(item_counts) > n:
+        # Keep every item at least as frequent as the n-th largest count
+        threshold = item_counts[np.argpartition(item_counts, -n)[-n]]
+        top = np.flatnonzero(item_counts >= threshold)
+    else:
+        top = np.arange(len(item_counts))
+    
+    top = top[np.argsort(-item_counts[top], kind='stable')][:n]
+    return {items[code]: count for code, count in zip(top.tolist(), item_counts[top].tolist())}
+
+
+def save_statistics(stats, stats_file):
+    """
+    Saves the cleaning statistics.
     
     Args:
-        transactions (list): List of clean transactions
         stats (dict): Generated statistics
-        output_file (str): Path to save cleaned transactions
         stats_file (str): Path to save statistics
     """
-    # Create directories if they don't exist
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-    
-    # Save cleaned transactions
-    with open(output_file, 'w') as f:
-        json.dump(transactions, f, indent=2)
-    
-    print(f"[INFO] Cleaned transactions saved to: {output_file}")
-    
-    # Save statistics
     with open(stats_file, 'w') as f:
         json.dump(stats, f, indent=2)
     
@@ -134,18 +170,16 @@ def main():
     
     # Define paths
     BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    INPUT_FILE = os.path.join(BASE_DIR, 'data', 'processed', 'loaded_transactions.json')
-    OUTPUT_FILE = os.path.join(BASE_DIR, 'data', 'processed', 'cleaned_transactions.json')
+    RAW_FILE = os.path.join(BASE_DIR, 'data', 'raw', 'data.csv')
+    OUTPUT_FILE = os.path.join(BASE_DIR, 'data', 'processed', 'cleaned_transactions.parquet')
     STATS_FILE = os.path.join(BASE_DIR, 'data', 'processed', 'cleaning_stats.json')
     
-    # Load data
-    raw_data = load_json_data(INPUT_FILE)
-    
-    # Clean transactions
-    cleaned_transactions = clean_transactions(raw_data)
+    # Load and clean transactions, saving them as they are cleaned
+    chunks = load_raw_transactions(RAW_FILE)
+    _, num_cleaned, item_counts = clean_transactions(chunks, OUTPUT_FILE)
     
     # Generate statistics
-    stats = generate_statistics(cleaned_transactions)
+    stats = generate_statistics(item_counts, num_cleaned)
     
     # Display statistics
     print("\n[INFO] Cleaning statistics:")
@@ -158,8 +192,8 @@ def main():
         print(f"    {i}. {item}: {count} rentals")
     print()
     
-    # Save data
-    save_cleaned_data(cleaned_transactions, stats, OUTPUT_FILE, STATS_FILE)
+    # Save statistics
+    save_statistics(stats, STATS_FILE)
     
     print("\n" + "="*60)
     print("DATA CLEANING COMPLETED SUCCESSFULLY")
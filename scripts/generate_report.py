@@ -4,71 +4,176 @@ Script to generate readable reports from Apriori analysis results.
 Creates reports in text and CSV format with frequent itemsets and association rules.
 """
 
-import json
 import os
-import csv
+import heapq
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
 from datetime import datetime
+from itertools import islice
+from multiprocessing import Pool, current_process
 
+import ijson
+import numpy as np
+import orjson
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pv
 
-def load_results(results_dir):
+
+# Number of itemsets of each size and of rules shown in the text report
+TOP_ITEMSETS_PER_SIZE = 10
+TOP_RULES = 20
+
+# Number of records converted to Arrow at a time when writing the CSV reports
+CSV_BATCH_SIZE = 65536
+
+
+def iter_frequent_itemsets(results_dir):
     """
-    Loads Apriori analysis results.
+    Streams the frequent itemsets one at a time, without parsing the whole file.
     
     Args:
         results_dir (str): Directory with results
         
-    Returns:
-        tuple: (frequent_itemsets, association_rules)
+    Yields:
+        dict: Frequent itemset
     """
-    print("[INFO] Loading analysis results...")
-    
-    # Load frequent itemsets
     itemsets_file = os.path.join(results_dir, 'frequent_itemsets.json')
-    with open(itemsets_file, 'r') as f:
-        frequent_itemsets = json.load(f)
     
-    # Load association rules
+    # Intern the movie names: every occurrence of a movie shares one string,
+    # so the Counter lookups hit the identity fast path
+    cache = {}
+    with open(itemsets_file, 'rb') as f:
+        for item in ijson.items(f, 'item', use_float=True):
+            item['itemset'] = [cache.setdefault(movie, movie) for movie in item['itemset']]
+            yield item
+
+
+def iter_association_rules(results_dir):
+    """
+    Streams the association rules one at a time, without parsing the whole file.
+    
+    Args:
+        results_dir (str): Directory with results
+        
+    Yields:
+        dict: Association rule
+    """
     rules_file = os.path.join(results_dir, 'association_rules.json')
-    with open(rules_file, 'r') as f:
-        association_rules = json.load(f)
     
-    print(f"[INFO] Loaded {len(frequent_itemsets)} frequent itemsets")
-    print(f"[INFO] Loaded {len(association_rules)} association rules")
+    # Intern the movie names, as in iter_frequent_itemsets
+    cache = {}
+    with open(rules_file, 'rb') as f:
+        for rule in ijson.items(f, 'item', use_float=True):
+            rule['antecedent'] = [cache.setdefault(movie, movie) for movie in rule['antecedent']]
+            rule['consequent'] = [cache.setdefault(movie, movie) for movie in rule['consequent']]
+            yield rule
+
+
+@dataclass
+class ItemsetScan:
+    """
+    Reductions over the frequent itemsets, computed in a single pass by scan_itemsets.
+    """
+    size_distribution: dict = field(default_factory=dict)
+    top_by_size: defaultdict = field(default_factory=lambda: defaultdict(list))
+    movie_freq: Counter = field(default_factory=Counter)
+    support_sum: float = 0.0
+    n: int = 0
+
+
+def scan_itemsets(frequent_itemsets):
+    """
+    Walks the frequent itemsets once, gathering everything the reports need.
+    
+    Args:
+        frequent_itemsets (iterable): Frequent itemsets (may be streamed)
+        
+    Returns:
+        ItemsetScan: Size distribution, heaps with the top itemsets of each
+            size, number of itemsets each movie appears in, support sum and
+            itemset count
+    """
+    scan = ItemsetScan()
+    for item in frequent_itemsets:
+        size = item['size']
+        scan.size_distribution[size] = scan.size_distribution.get(size, 0) + 1
+        
+        # Bounded min-heap of (support, -position, itemset): ties keep the earliest itemsets
+        heap = scan.top_by_size[size]
+        entry = (item['support'], -scan.n, item)
+        if len(heap) < TOP_ITEMSETS_PER_SIZE:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+        
+        scan.movie_freq.update(item['itemset'])
+        scan.support_sum += item['support']
+        scan.n += 1
+    return scan
+
+
+@dataclass
+class RuleScan:
+    """
+    Reductions over the association rules, computed in a single pass by scan_rules.
+    """
+    top_rules: list = field(default_factory=list)
+    metrics: np.ndarray = None
+
+
+def scan_rules(rules):
+    """
+    Walks the association rules once, keeping the first (highest lift)
+    rules and the confidence and lift of every rule.
+    
+    Args:
+        rules (iterable): Association rules ordered by lift (may be streamed)
+        
+    Returns:
+        RuleScan: Top rules and structured array of metrics
+    """
+    scan = RuleScan()
+    
+    def metrics():
+        for rule in rules:
+            if len(scan.top_rules) < TOP_RULES:
+                scan.top_rules.append(rule)
+            yield rule['confidence'], rule['lift']
     
-    return frequent_itemsets, association_rules
+    scan.metrics = np.fromiter(metrics(), dtype=[('confidence', np.float64), ('lift', np.float64)])
+    return scan
 
 
-def generate_text_report(frequent_itemsets, rules, output_file):
+def generate_text_report(scan, rule_scan, output_file, timestamp):
     """
     Generates a readable text format report.
     
     Args:
-        frequent_itemsets (list): List of frequent itemsets
-        rules (list): List of association rules
+        scan (ItemsetScan): Scan of the frequent itemsets
+        rule_scan (RuleScan): Scan of the association rules
         output_file (str): Output file path
+        timestamp (str): Generation date written in the report
     """
     print("[INFO] Generating text report...")
     
-    with open(output_file, 'w', encoding='utf-8') as f:
+    # Many small writes: buffer them in 1 MiB blocks
+    with open(output_file, 'w', encoding='utf-8', buffering=1 << 20) as f:
         # Header
         f.write("="*80 + "\n")
         f.write("MOVIE RENTAL PATTERN ANALYSIS REPORT\n")
         f.write("Algorithm: Apriori\n")
-        f.write(f"Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        f.write(f"Date: {timestamp}\n")
         f.write("="*80 + "\n\n")
         
         # Executive Summary
         f.write("EXECUTIVE SUMMARY\n")
         f.write("-"*80 + "\n")
-        f.write(f"Total frequent itemsets found: {len(frequent_itemsets)}\n")
-        f.write(f"Total association rules generated: {len(rules)}\n\n")
+        f.write(f"Total frequent itemsets found: {scan.n}\n")
+        f.write(f"Total association rules generated: {len(rule_scan.metrics)}\n\n")
         
         # Size distribution
-        size_distribution = {}
-        for item in frequent_itemsets:
-            size = item['size']
-            size_distribution[size] = size_distribution.get(size, 0) + 1
-        
+        size_distribution = scan.size_distribution
         f.write("Itemset distribution by size:\n")
         for size in sorted(size_distribution.keys()):
             f.write(f"  - Size {size}: {size_distribution[size]} itemsets\n")
@@ -79,67 +184,60 @@ def generate_text_report(frequent_itemsets, rules, output_file):
         f.write("FREQUENT ITEMSETS\n")
         f.write("="*80 + "\n\n")
         
-        # Group by size
-        itemsets_by_size = {}
-        for item in frequent_itemsets:
-            size = item['size']
-            if size not in itemsets_by_size:
-                itemsets_by_size[size] = []
-            itemsets_by_size[size].append(item)
-        
-        for size in sorted(itemsets_by_size.keys()):
+        # Show top itemsets of each size by support
+        for size in sorted(scan.top_by_size.keys()):
             f.write(f"\n--- Itemsets of size {size} ---\n\n")
-            items = itemsets_by_size[size]
-            # Show top 10 by support
-            for i, item in enumerate(items[:10], 1):
+            top = sorted(scan.top_by_size[size], reverse=True)
+            for i, (support, _, item) in enumerate(top, 1):
                 itemset_str = ", ".join(item['itemset'])
                 f.write(f"{i}. [{itemset_str}]\n")
-                f.write(f"   Support: {item['support']:.4f} ({item['support']*100:.2f}%)\n\n")
+                f.write(f"   Support: {support:.4f} ({support*100:.2f}%)\n\n")
             
-            if len(items) > 10:
-                f.write(f"   ... and {len(items)-10} more itemsets\n\n")
+            count = size_distribution[size]
+            if count > TOP_ITEMSETS_PER_SIZE:
+                f.write(f"   ... and {count-TOP_ITEMSETS_PER_SIZE} more itemsets\n\n")
         
         # Association rules
         f.write("\n" + "="*80 + "\n")
         f.write("ASSOCIATION RULES\n")
         f.write("="*80 + "\n\n")
-        f.write("Top 20 rules ordered by Lift:\n\n")
+        f.write(f"Top {TOP_RULES} rules ordered by Lift:\n\n")
         
-        for i, rule in enumerate(rules[:20], 1):
+        for i, rule in enumerate(rule_scan.top_rules, 1):
             antecedent_str = ", ".join(rule['antecedent'])
             consequent_str = ", ".join(rule['consequent'])
+            support = rule['support']
+            confidence = rule['confidence']
+            confidence_pct = f"{confidence*100:.2f}"
             
-            f.write(f"{i}. [{antecedent_str}] => [{consequent_str}]\n")
-            f.write(f"   Support: {rule['support']:.4f} ({rule['support']*100:.2f}%)\n")
-            f.write(f"   Confidence: {rule['confidence']:.4f} ({rule['confidence']*100:.2f}%)\n")
-            f.write(f"   Lift: {rule['lift']:.4f}\n")
-            f.write(f"\n   Interpretation: If a customer rents [{antecedent_str}],\n")
-            f.write(f"   there is a {rule['confidence']*100:.2f}% probability they will also rent [{consequent_str}]\n\n")
+            f.write(
+                f"{i}. [{antecedent_str}] => [{consequent_str}]\n"
+                f"   Support: {support:.4f} ({support*100:.2f}%)\n"
+                f"   Confidence: {confidence:.4f} ({confidence_pct}%)\n"
+                f"   Lift: {rule['lift']:.4f}\n"
+                f"\n   Interpretation: If a customer rents [{antecedent_str}],\n"
+                f"   there is a {confidence_pct}% probability they will also rent [{consequent_str}]\n\n"
+            )
         
-        if len(rules) > 20:
-            f.write(f"... and {len(rules)-20} more rules\n\n")
+        if len(rule_scan.metrics) > TOP_RULES:
+            f.write(f"... and {len(rule_scan.metrics)-TOP_RULES} more rules\n\n")
         
         # Key insights
         f.write("\n" + "="*80 + "\n")
         f.write("KEY INSIGHTS\n")
         f.write("="*80 + "\n\n")
         
-        if rules:
-            top_rule = rules[0]
+        if rule_scan.top_rules:
+            top_rule = rule_scan.top_rules[0]
             f.write("Strongest rule (highest Lift):\n")
             f.write(f"[{', '.join(top_rule['antecedent'])}] => [{', '.join(top_rule['consequent'])}]\n")
             f.write(f"Lift: {top_rule['lift']:.4f}\n\n")
             
-            # Most frequent movie in itemsets
-            movie_freq = {}
-            for item in frequent_itemsets:
-                for movie in item['itemset']:
-                    movie_freq[movie] = movie_freq.get(movie, 0) + 1
-            
-            if movie_freq:
-                most_freq_movie = max(movie_freq, key=movie_freq.get)
+            # Most frequent movie in itemsets (ties go to the first movie seen)
+            if scan.movie_freq:
+                most_freq_movie, appearances = scan.movie_freq.most_common(1)[0]
                 f.write(f"Movie appearing in most itemsets: {most_freq_movie}\n")
-                f.write(f"Appearances: {movie_freq[most_freq_movie]}\n\n")
+                f.write(f"Appearances: {appearances}\n\n")
         
         f.write("="*80 + "\n")
         f.write("END OF REPORT\n")
@@ -148,96 +246,108 @@ def generate_text_report(frequent_itemsets, rules, output_file):
     print(f"[INFO] Text report saved to: {output_file}")
 
 
+def write_csv(records, columns, output_file):
+    """
+    Streams records into a CSV file, converting them to Arrow in batches
+    of CSV_BATCH_SIZE for Arrow's CSV writer.
+    
+    Args:
+        records (iterable): Records (dicts) to write
+        columns (list): (header, record key, Arrow type) of each column;
+            lists of strings are joined with "; "
+        output_file (str): Output file path
+    """
+    schema = pa.schema([
+        (header, pa.string() if pa.types.is_list(type_) else type_)
+        for header, _, type_ in columns
+    ])
+    
+    # Arrow quotes every string field (numbers never); lines end with CRLF as with the csv module
+    write_options = pv.WriteOptions(quoting_style='needed', quoting_header='needed', eol='\r\n')
+    
+    records = iter(records)
+    with pv.CSVWriter(output_file, schema, write_options=write_options) as writer:
+        while batch := list(islice(records, CSV_BATCH_SIZE)):
+            arrays = []
+            for _, key, type_ in columns:
+                array = pa.array([record[key] for record in batch], type=type_)
+                if pa.types.is_list(type_):
+                    # Join each list of movies in one Arrow kernel call
+                    array = pc.binary_join(array, '; ')
+                arrays.append(array)
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+
+
 def generate_csv_reports(frequent_itemsets, rules, output_dir):
     """
-    Generates reports in CSV format for easy analysis.
+    Generates reports in CSV format for easy analysis. Support and
+    confidence are written as fractions (0-1) for spreadsheets to format.
     
     Args:
-        frequent_itemsets (list): List of frequent itemsets
-        rules (list): List of association rules
+        frequent_itemsets (iterable): Frequent itemsets (may be streamed)
+        rules (iterable): Association rules (may be streamed)
         output_dir (str): Output directory
     """
     print("[INFO] Generating CSV reports...")
     
+    movies = pa.list_(pa.string())
+    
     # CSV of frequent itemsets
     itemsets_csv = os.path.join(output_dir, 'frequent_itemsets.csv')
-    with open(itemsets_csv, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow(['Itemset', 'Size', 'Support', 'Support_Percentage'])
-        
-        for item in frequent_itemsets:
-            itemset_str = "; ".join(item['itemset'])
-            writer.writerow([
-                itemset_str,
-                item['size'],
-                item['support'],
-                f"{item['support']*100:.2f}%"
-            ])
+    write_csv(frequent_itemsets, [
+        ('Itemset', 'itemset', movies),
+        ('Size', 'size', pa.int32()),
+        ('Support', 'support', pa.float64())
+    ], itemsets_csv)
     
     print(f"[INFO] Itemsets CSV saved to: {itemsets_csv}")
     
     # CSV of association rules
     rules_csv = os.path.join(output_dir, 'association_rules.csv')
-    with open(rules_csv, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow([
-            'Antecedent', 'Consequent', 'Support', 'Confidence', 
-            'Lift', 'Confidence_Percentage'
-        ])
-        
-        for rule in rules:
-            antecedent_str = "; ".join(rule['antecedent'])
-            consequent_str = "; ".join(rule['consequent'])
-            writer.writerow([
-                antecedent_str,
-                consequent_str,
-                rule['support'],
-                rule['confidence'],
-                rule['lift'],
-                f"{rule['confidence']*100:.2f}%"
-            ])
+    write_csv(rules, [
+        ('Antecedent', 'antecedent', movies),
+        ('Consequent', 'consequent', movies),
+        ('Support', 'support', pa.float64()),
+        ('Confidence', 'confidence', pa.float64()),
+        ('Lift', 'lift', pa.float64())
+    ], rules_csv)
     
     print(f"[INFO] Rules CSV saved to: {rules_csv}")
 
 
-def generate_summary_stats(frequent_itemsets, rules, output_file):
+def generate_summary_stats(scan, rule_scan, output_file, timestamp):
     """
     Generates a file with summary statistics.
     
     Args:
-        frequent_itemsets (list): List of frequent itemsets
-        rules (list): List of association rules
+        scan (ItemsetScan): Scan of the frequent itemsets
+        rule_scan (RuleScan): Scan of the association rules
         output_file (str): Output file path
+        timestamp (str): Generation date written in the statistics
     """
     print("[INFO] Generating summary statistics...")
     
     stats = {
-        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-        'total_frequent_itemsets': len(frequent_itemsets),
-        'total_association_rules': len(rules),
-        'itemsets_by_size': {},
-        'avg_support': 0,
+        'timestamp': timestamp,
+        'total_frequent_itemsets': scan.n,
+        'total_association_rules': 0,
+        'itemsets_by_size': dict(scan.size_distribution),
+        'avg_support': scan.support_sum / scan.n if scan.n else 0,
         'avg_confidence': 0,
         'avg_lift': 0,
         'max_lift': 0,
         'min_lift': 0
     }
     
-    # Itemset statistics
-    for item in frequent_itemsets:
-        size = item['size']
-        stats['itemsets_by_size'][size] = stats['itemsets_by_size'].get(size, 0) + 1
-        stats['avg_support'] += item['support']
-    
-    if frequent_itemsets:
-        stats['avg_support'] /= len(frequent_itemsets)
+    # Rule statistics, reduced in NumPy
+    metrics = rule_scan.metrics
+    stats['total_association_rules'] = len(metrics)
     
-    # Rule statistics
-    if rules:
-        stats['avg_confidence'] = sum(r['confidence'] for r in rules) / len(rules)
-        stats['avg_lift'] = sum(r['lift'] for r in rules) / len(rules)
-        stats['max_lift'] = max(r['lift'] for r in rules)
-        stats['min_lift'] = min(r['lift'] for r in rules)
+    if len(metrics):
+        stats['avg_confidence'] = float(metrics['confidence'].mean())
+        stats['avg_lift'] = float(metrics['lift'].mean())
+        stats['max_lift'] = float(metrics['lift'].max())
+        stats['min_lift'] = float(metrics['lift'].min())
     
     # Round values
     stats['avg_support'] = round(stats['avg_support'], 4)
@@ -246,49 +356,128 @@ def generate_summary_stats(frequent_itemsets, rules, output_file):
     stats['max_lift'] = round(stats['max_lift'], 4)
     stats['min_lift'] = round(stats['min_lift'], 4)
     
-    with open(output_file, 'w') as f:
-        json.dump(stats, f, indent=2)
+    # Size keys are integers, written as strings like json.dump does;
+    # keys are sorted so the file diffs cleanly between runs
+    with open(output_file, 'wb') as f:
+        f.write(orjson.dumps(stats, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS))
     
     print(f"[INFO] Statistics saved to: {output_file}")
 
 
+def scan_itemsets_file(results_dir):
+    """
+    Scans the frequent itemsets file of a results directory (pool worker).
+    
+    Args:
+        results_dir (str): Directory with results
+        
+    Returns:
+        ItemsetScan: Scan of the frequent itemsets
+    """
+    return scan_itemsets(iter_frequent_itemsets(results_dir))
+
+
+def scan_rules_file(results_dir):
+    """
+    Scans the association rules file of a results directory (pool worker).
+    
+    Args:
+        results_dir (str): Directory with results
+        
+    Returns:
+        RuleScan: Scan of the association rules
+    """
+    return scan_rules(iter_association_rules(results_dir))
+
+
+def generate_csv_reports_files(results_dir):
+    """
+    Writes the CSV reports of a results directory (pool worker).
+    
+    Args:
+        results_dir (str): Directory with results
+    """
+    generate_csv_reports(iter_frequent_itemsets(results_dir),
+                         iter_association_rules(results_dir), results_dir)
+
+
+def generate_reports(results_dir, timestamp=None):
+    """
+    Generates all reports, streaming the results files. The itemset scan,
+    the rule scan and the CSV writer run concurrently in a pool of three
+    processes, each reading its own stream of the files; only the scans
+    are sent back, and the text report and the statistics are then built
+    from them. In a daemonic process, which cannot start a pool, the
+    three run one after another instead.
+    
+    Args:
+        results_dir (str): Directory with results
+        timestamp (str): Generation date shared by the reports
+            (None for the current date)
+        
+    Returns:
+        tuple: (ItemsetScan, RuleScan)
+    """
+    if timestamp is None:
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    
+    print("[INFO] Streaming analysis results...")
+    
+    # Airflow's LocalExecutor runs each task in a fork of a daemonic
+    # worker, and daemonic processes are not allowed to have children
+    if current_process().daemon:
+        scan = scan_itemsets_file(results_dir)
+        rule_scan = scan_rules_file(results_dir)
+        generate_csv_reports_files(results_dir)
+    else:
+        with Pool(processes=3) as pool:
+            itemset_scan = pool.apply_async(scan_itemsets_file, (results_dir,))
+            rule_scan = pool.apply_async(scan_rules_file, (results_dir,))
+            csv_reports = pool.apply_async(generate_csv_reports_files, (results_dir,))
+            scan, rule_scan = itemset_scan.get(), rule_scan.get()
+            csv_reports.get()
+    
+    print(f"[INFO] Loaded {scan.n} frequent itemsets")
+    print(f"[INFO] Loaded {len(rule_scan.metrics)} association rules")
+    
+    text_report_file = os.path.join(results_dir, 'analysis_report.txt')
+    generate_text_report(scan, rule_scan, text_report_file, timestamp)
+    
+    stats_file = os.path.join(results_dir, 'summary_statistics.json')
+    generate_summary_stats(scan, rule_scan, stats_file, timestamp)
+    
+    return scan, rule_scan
+
+
 def main():
     """
     Main function that generates all reports.
     """
+    # One timestamp for the log and every report
+    TIMESTAMP = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    
     print("="*60)
     print("GENERATING ANALYSIS REPORTS")
     print("="*60)
-    print(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"Timestamp: {TIMESTAMP}")
     print()
     
     # Define paths
     BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     RESULTS_DIR = os.path.join(BASE_DIR, 'data', 'results')
     
-    # Load results
-    frequent_itemsets, rules = load_results(RESULTS_DIR)
-    
-    # Generate text report
-    text_report_file = os.path.join(RESULTS_DIR, 'analysis_report.txt')
-    generate_text_report(frequent_itemsets, rules, text_report_file)
-    
-    # Generate CSV reports
-    generate_csv_reports(frequent_itemsets, rules, RESULTS_DIR)
-    
-    # Generate summary statistics
-    stats_file = os.path.join(RESULTS_DIR, 'summary_statistics.json')
-    generate_summary_stats(frequent_itemsets, rules, stats_file)
+    # Generate text, CSV and summary statistics reports
+    generate_reports(RESULTS_DIR, TIMESTAMP)
     
     print("\n" + "="*60)
     print("REPORT GENERATION COMPLETED SUCCESSFULLY")
     print("="*60)
     print("\nGenerated files:")
-    print(f"  - {text_report_file}")
+    print(f"  - {os.path.join(RESULTS_DIR, 'analysis_report.txt')}")
     print(f"  - {os.path.join(RESULTS_DIR, 'frequent_itemsets.csv')}")
     print(f"  - {os.path.join(RESULTS_DIR, 'association_rules.csv')}")
-    print(f"  - {stats_file}")
+    print(f"  - {os.path.join(RESULTS_DIR, 'summary_statistics.json')}")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
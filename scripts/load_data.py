@@ -1,24 +1,29 @@
 """
 load_data.py
 Script to load raw movie rental transaction data.
-Reads the CSV file and prepares data for processing.
+Reads the CSV file in chunks for the cleaning step.
 """
 
-import pandas as pd
 import os
-import json
 from datetime import datetime
 
+import pyarrow as pa
+import pyarrow.csv as pv
 
-def load_raw_transactions(raw_file_path):
+
+def load_raw_transactions(raw_file_path, block_size=1 << 24):
     """
-    Loads the raw transaction CSV file.
+    Opens the raw transaction CSV file for reading in chunks, so the
+    whole dataset is never held in memory at once. The file is parsed by
+    the multithreaded PyArrow CSV reader, straight into Arrow arrays.
     
     Args:
         raw_file_path (str): Path to the raw CSV file
+        block_size (int): Approximate size in bytes of each chunk
         
     Returns:
-        pd.DataFrame: DataFrame with loaded transactions
+        pa.RecordBatchReader: Reader over record batches with the
+            TransactionID and Items columns
     """
     print(f"[INFO] Loading data from: {raw_file_path}")
     
@@ -26,34 +31,13 @@ def load_raw_transactions(raw_file_path):
     if not os.path.exists(raw_file_path):
         raise FileNotFoundError(f"File {raw_file_path} does not exist")
     
-    # Load CSV
-    df = pd.read_csv(raw_file_path)
-    
-    print(f"[INFO] Loaded {len(df)} transactions")
-    print(f"[INFO] Columns: {list(df.columns)}")
-    
-    return df
-
-
-def save_loaded_data(df, output_path):
-    """
-    Saves loaded data in JSON format for the next step.
-    
-    Args:
-        df (pd.DataFrame): DataFrame with transactions
-        output_path (str): Path to save the processed file
-    """
-    # Create directory if it doesn't exist
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    
-    # Convert to list of dictionaries
-    data = df.to_dict('records')
-    
-    # Save as JSON
-    with open(output_path, 'w') as f:
-        json.dump(data, f, indent=2)
-    
-    print(f"[INFO] Data saved to: {output_path}")
+    # Only the needed columns are parsed, one block at a time
+    return pv.open_csv(
+        raw_file_path,
+        read_options=pv.ReadOptions(block_size=block_size),
+        convert_options=pv.ConvertOptions(include_columns=['TransactionID', 'Items'],
+                                          column_types={'Items': pa.string()})
+    )
 
 
 def main():
@@ -69,19 +53,17 @@ def main():
     # Define paths
     BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     RAW_FILE = os.path.join(BASE_DIR, 'data', 'raw', 'data.csv')
-    OUTPUT_FILE = os.path.join(BASE_DIR, 'data', 'processed', 'loaded_transactions.json')
     
-    # Load data
-    df = load_raw_transactions(RAW_FILE)
+    # Load a first chunk of data. The cleaning step streams the whole file
+    # itself, so no intermediate file is saved
+    with load_raw_transactions(RAW_FILE) as chunks:
+        chunk = chunks.read_next_batch()
     
     # Display data sample
     print("\n[INFO] Data sample:")
-    print(df.head())
+    print(chunk.slice(0, 5).to_pandas())
     print()
     
-    # Save data
-    save_loaded_data(df, OUTPUT_FILE)
-    
     print("\n" + "="*60)
     print("DATA LOADING COMPLETED SUCCESSFULLY")
     print("="*60)
@@ -0,0 +1,48 @@
+"""
+test_apriori.py
+Regression tests for the Apriori backends.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+from apriori import AprioriAlgorithm, fim
+
+
+def run_apriori(transactions, backend):
+    """
+    Runs the Apriori algorithm on some transactions.
+    
+    Args:
+        transactions (list): List of lists with items
+        backend (str): Backend used to find the frequent itemsets
+    
+    Returns:
+        tuple: Frequent itemsets (as (itemset, support) pairs, in order) and rules
+    """
+    apriori = AprioriAlgorithm(min_support=0.5, min_confidence=0.5, min_lift=1.0, backend=backend)
+    apriori.load_transactions(transactions)
+    frequent_itemsets = apriori.find_frequent_itemsets()
+    rules = apriori.generate_association_rules()
+    return list(frequent_itemsets.items()), rules
+
+
+@pytest.mark.skipif(fim is None, reason="pyfim is not installed")
+@pytest.mark.parametrize('transactions', [
+    [['A', 'B'], ['A', 'B'], ['A', 'C'], ['A', 'B', 'C']],
+    [['A', 'B'], ['A', 'B', 'C'], ['B', 'A']],
+    [['A']],
+])
+def test_fim_keeps_items_in_every_transaction(transactions):
+    """
+    pyfim leaves out the items found in every transaction; the 'fim'
+    backend must still report them like the level-wise search does.
+    """
+    frequent_itemsets, rules = run_apriori(transactions, 'fim')
+    
+    assert (0,) in dict(frequent_itemsets)
+    assert (frequent_itemsets, rules) == run_apriori(transactions, 'bitmap')